@@ -16,6 +16,8 @@
 #  Author: Abhishek Govindarasu
 
 import sys
+import json
+import atexit
 import argparse
 from lib.helpers import fprint, err_print
 
@@ -26,6 +28,27 @@ if sys.version_info < (3, 7):
     sys.exit(1)
 
 
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"expected a number >= 0, got {value}")
+    return number
+
+
+def false_positive_rate(value):
+    rate = float(value)
+    if not 0 < rate < 1:
+        raise argparse.ArgumentTypeError(f"expected a rate between 0 and 1, got {value}")
+    return rate
+
+
+def report_profile(profiler, path):
+    err_print(profiler.format_tree())
+    with open(path, "w") as f:
+        json.dump(profiler.to_dict(), f, indent=2)
+    err_print(f"Profile written to {path}")
+
+
 def main(args):
     input_cmd = args.cmd
     output_file = args.output
@@ -34,29 +57,141 @@ def main(args):
         lib.core.DEBUG = True
 
     from lib.core.parse import Parser
+    from lib.core.definitions import CACHE
+
+    if args.cache_budget is not None:
+        CACHE.budget = args.cache_budget
+
+    if args.serve:
+        from lib.server import serve
+
+        serve(args.serve)
+        sys.exit(0)
+
+    columns = [Parser(cmd).parse() for cmd in input_cmd]
+    if len(columns) == 1:
+        expression = columns[0]
+    else:
+        if args.jobs or args.sorted:
+            err_print("--jobs and --sorted can not be used with more than one -c.")
+            sys.exit(1)
+
+        from lib.core.combine import Combination
+
+        expression = Combination(columns, args.separator, args.combine)
+
+    previous = None
+    if args.since is not None:
+        if len(columns) > 1:
+            err_print("--since can not be used with more than one -c.")
+            sys.exit(1)
 
-    parser = Parser(input_cmd)
-    expression = parser.parse()
+        from lib.core.automaton import Automaton
+
+        previous = Automaton(Parser(args.since).parse())
+
+    # --sorted skips duplicates, so its size is the number of distinct
+    # strings rather than the structural size of the expression.
+    size = expression.size()
+    if args.sorted or previous is not None:
+        from lib.core.automaton import Automaton, AutomatonException
+
+        automaton = Automaton(expression)
+
+    if args.sorted:
+        try:
+            size = automaton.count(previous)
+        except AutomatonException:
+            err_print("Could not count the sorted lines exactly, using an upper bound.")
+    elif previous is not None and args.size:
+        # Without --sorted, --since keeps duplicate lines, so the number
+        # of distinct new lines is only exact if there are no duplicates.
+        try:
+            if automaton.count() == size:
+                size = automaton.count(previous)
+            else:
+                err_print(
+                    "The expression generates duplicates, showing an upper bound. "
+                    "Use --sorted for the exact count."
+                )
+        except AutomatonException:
+            err_print("Could not count the new lines exactly, showing an upper bound.")
 
     if args.size:
-        print(expression.size())
+        print(size)
         sys.exit(0)
 
     if args.debug:
         err_print("[DEBUG] Expression generated:", expression)
         err_print("[DEBUG] Size of expression:", expression.size())
 
-    if not args.force and expression.size() > FUZEX_TOO_MANY_WORDS:
-        err_print(f"The provided expression will generate {expression.size()} lines.")
+    if len(columns) > 1:
+        err_print(
+            f"Combining {len(columns)} expressions ({args.combine}) "
+            f"into {expression.size()} lines."
+        )
+        if expression.materialized_bytes() > CACHE.budget:
+            err_print(
+                f"Warning: about {expression.materialized_bytes()} bytes of reused "
+                "columns will be kept in memory, more than --cache-budget."
+            )
+
+    if not args.force and size > FUZEX_TOO_MANY_WORDS:
+        err_print(f"The provided expression will generate {size} lines.")
         err_print("If you still want to run this, use the --force flag.")
         sys.exit(1)
 
+    if args.profile and args.sorted:
+        err_print("--profile can not be combined with --sorted.")
+        sys.exit(1)
+
+    if args.jobs:
+        if args.profile or args.exclude or args.sorted or args.since is not None:
+            err_print(
+                "--profile, --exclude, --sorted and --since can not be combined with --jobs."
+            )
+            sys.exit(1)
+
+        if output_file == sys.stdout:
+            err_print("Parallel output (--jobs) requires an output file.")
+            sys.exit(1)
+
+        from lib.writer import write_parallel
+
+        output_file.close()
+        write_parallel(input_cmd[0], output_file.name, args.jobs)
+        sys.exit(0)
+
+    if args.exclude:
+        from lib.exclude import ExcludeException, open_exclusion
+
+        try:
+            exclusion = open_exclusion(args.exclude, args.exclude_fp, args.index_dir)
+        except (ExcludeException, OSError) as e:
+            err_print(f"Could not open --exclude list: {e}")
+            sys.exit(1)
+
+    if args.profile:
+        from lib.core.profiler import Profiler
+
+        profiler = Profiler(expression)
+        atexit.register(report_profile, profiler, args.profile)
+
+    if args.sorted:
+        lines = automaton.generate_sorted(previous)
+    else:
+        lines = expression.generate()
+        if previous is not None:
+            lines = (line for line in lines if not previous.matches(line))
+    if args.exclude:
+        lines = (line for line in lines if line not in exclusion)
+
     if args.output == sys.stdout:
-        for line in expression.generate():
+        for line in lines:
             sys.stdout.write(line)
             sys.stdout.write("\n")
     else:
-        for line in expression.generate():
+        for line in lines:
             fprint(output_file, line)
 
     sys.exit(0)
@@ -64,7 +199,12 @@ def main(args):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fuzex command line arguments")
-    parser.add_argument("-c", "--cmd", help="input command (required)", required=True)
+    parser.add_argument(
+        "-c",
+        "--cmd",
+        help="input command (required unless --serve), repeat to combine several",
+        action="append",
+    )
     parser.add_argument(
         "-s",
         "--size",
@@ -85,6 +225,70 @@ if __name__ == "__main__":
         help="Will allow Fuzex to process a large generation of words",
         action="store_true",
     )
+    parser.add_argument(
+        "--combine",
+        help="how to combine several -c expressions (default: product); "
+        "columns that are repeated are kept in memory",
+        choices=("product", "zip", "cycle"),
+        default="product",
+    )
+    parser.add_argument(
+        "--separator",
+        help="separator between combined expressions (default: ':')",
+        default=":",
+    )
+    parser.add_argument(
+        "--sorted",
+        help="output each distinct line once, in byte order",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--since",
+        help="only output lines that the expression OLD_EXPR does not generate",
+        metavar="OLD_EXPR",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="write the output file using N processes (0: serial)",
+        type=non_negative_int,
+        metavar="N",
+    )
+    parser.add_argument(
+        "--serve",
+        help="serve expressions to local clients over the Unix socket SOCKET",
+        metavar="SOCKET",
+    )
+    parser.add_argument(
+        "-x",
+        "--exclude",
+        help="skip lines that appear in the wordlist FILE",
+        metavar="FILE",
+    )
+    parser.add_argument(
+        "--index-dir",
+        help="keep the --exclude index in DIR (default: next to FILE, or ~/.cache/fuzex)",
+        metavar="DIR",
+    )
+    parser.add_argument(
+        "--exclude-fp",
+        help="use an approximate filter for --exclude with false positive rate RATE",
+        type=false_positive_rate,
+        metavar="RATE",
+    )
+    parser.add_argument(
+        "--profile",
+        help="profile each node of the expression, writing JSON to FILE (default: fuzex-profile.json)",
+        nargs="?",
+        const="fuzex-profile.json",
+        metavar="FILE",
+    )
+    parser.add_argument(
+        "--cache-budget",
+        help="approximate memory in bytes used to keep generated strings for reuse (default: 64 MiB, 0 disables)",
+        type=int,
+        metavar="N",
+    )
     parser.add_argument(
         "-d",
         "--debug",
@@ -94,6 +298,8 @@ if __name__ == "__main__":
 
     try:
         args = parser.parse_args()
+        if args.cmd is None and args.serve is None:
+            parser.error("the following arguments are required: -c/--cmd")
         main(args)
     except KeyboardInterrupt:
         err_print("exiting...")
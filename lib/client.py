@@ -0,0 +1,71 @@
+import socket
+
+from .protocol import (
+    FRAME_DATA,
+    FRAME_END,
+    FRAME_ERROR,
+    FRAME_SIZE,
+    ProtocolException,
+    recv_frame,
+    send_request,
+)
+
+
+class ClientException(Exception):
+    pass
+
+
+class FuzexClient:
+    """
+    Client for a Fuzex server started with fuzex.py --serve.
+
+        with FuzexClient("/tmp/fuzex.sock") as client:
+            total = client.size("[a-z]{4}")
+            for line in client.generate("[a-z]{4}", 0, total // 2):
+                ...
+
+    Requests on one client are answered in order, so a generate()
+    must be consumed completely before the next request is made.
+    """
+
+    def __init__(self, path) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.sock.close()
+
+    def size(self, cmd):
+        send_request(self.sock, {"op": "size", "cmd": cmd})
+        size = None
+        for kind, payload in self._frames():
+            if kind == FRAME_SIZE:
+                size = int(payload)
+        return size
+
+    def generate(self, cmd, start=None, stop=None):
+        """Yields the lines of cmd, optionally only those from start to stop."""
+        send_request(
+            self.sock, {"op": "generate", "cmd": cmd, "start": start, "stop": stop}
+        )
+        for kind, payload in self._frames():
+            if kind == FRAME_DATA:
+                # Data frames always end with a newline.
+                yield from payload.decode().split("\n")[:-1]
+
+    def _frames(self):
+        while True:
+            kind, payload = recv_frame(self.sock)
+            if kind == FRAME_END:
+                return
+            if kind == FRAME_ERROR:
+                raise ClientException(payload.decode())
+            if kind not in (FRAME_DATA, FRAME_SIZE):
+                raise ProtocolException(f"Unexpected frame type {kind}.")
+            yield kind, payload
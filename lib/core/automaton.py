@@ -0,0 +1,214 @@
+# Automaton for the language of a Fuzex expression. The expression is
+# compiled into a nondeterministic automaton without epsilon moves, where
+# each state consumes one character from a set of code point intervals.
+# Bounded quantifiers are unrolled, so the automaton is acyclic and its
+# size is proportional to the expression, not to the number of strings.
+
+from bisect import bisect_right
+from functools import lru_cache
+
+from .definitions import Char, DynamicChar, Expression, Join, Or, Statement
+
+# Pseudo state reached once a whole string has been read.
+ACCEPT = -1
+
+# Number of state sets whose outgoing transitions are remembered.
+TRANSITION_CACHE_SIZE = 1 << 12
+
+# Largest number of distinct state sets count() will visit.
+COUNT_STATE_LIMIT = 1 << 20
+
+# Sorts after every (lo, hi, next) transition starting at the same lo.
+_UPPER = 0x110000
+
+_EMPTY = frozenset()
+
+
+class AutomatonException(Exception):
+    pass
+
+
+class Automaton:
+    """
+    Nondeterministic automaton recognizing the strings of an expression.
+    State i consumes a character in self.labels[i] and moves to the
+    states in self.follow[i].
+    """
+
+    def __init__(self, expression) -> None:
+        self.labels = []
+        self.follow = []
+        self.start = self._build(expression, frozenset((ACCEPT,)))
+        self._transitions = lru_cache(maxsize=TRANSITION_CACHE_SIZE)(
+            self._compute_transitions
+        )
+        self._split = lru_cache(maxsize=TRANSITION_CACHE_SIZE)(self._compute_split)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _state(self, intervals, follow):
+        self.labels.append(intervals)
+        self.follow.append(follow)
+        return frozenset((len(self.labels) - 1,))
+
+    def _build(self, node, follow):
+        """Returns the states that start node, followed by the states in follow."""
+        if isinstance(node, Expression):
+            for statement in reversed(node.statements):
+                follow = self._build(statement, follow)
+            return follow
+
+        if isinstance(node, Statement):
+            # After n copies of the value, either stop (once n reaches the
+            # start of the quantifier) or read one more copy.
+            begin = node.quantifier.begin()
+            end = begin + node.quantifier.size() - 1
+            states = follow
+            for n in range(end - 1, -1, -1):
+                states = self._build(node.value, states)
+                if n >= begin:
+                    states = states | follow
+            return states
+
+        if isinstance(node, Join):
+            return self._build(node.expression, follow)
+
+        if isinstance(node, Or):
+            return self._build(node.value[0], follow) | self._build(node.value[1], follow)
+
+        if isinstance(node, DynamicChar):
+            return self._state(node.intervals, follow)
+
+        if isinstance(node, Char):
+            for c in reversed(node.value):
+                follow = self._state(((ord(c), ord(c)),), follow)
+            return follow
+
+        raise AutomatonException(f"Can not compile {node}.")
+
+    def _compute_transitions(self, states):
+        """
+        Splits the characters readable from states into ranges that lead
+        to the same states. Returns (lo, hi, next) tuples ordered by lo.
+        """
+        starts = {}
+        ends = {}
+        for s in states:
+            if s == ACCEPT:
+                continue
+            for lo, hi in self.labels[s]:
+                starts.setdefault(lo, []).append(s)
+                ends.setdefault(hi + 1, []).append(s)
+
+        transitions = []
+        active = set()
+        points = sorted(starts.keys() | ends.keys())
+        for lo, end in zip(points, points[1:]):
+            active.difference_update(ends.get(lo, ()))
+            active.update(starts.get(lo, ()))
+            if active:
+                follow = frozenset().union(*(self.follow[s] for s in active))
+                transitions.append((lo, end - 1, follow))
+        return transitions
+
+    def _compute_split(self, states, other, other_states):
+        """
+        Like _transitions, but also splits the ranges on the transitions
+        of other from other_states, returning (lo, hi, next, other_next)
+        tuples. other_next is empty where other can not follow.
+        """
+        theirs = other._transitions(other_states) if other_states else []
+        split = []
+        k = 0
+        for lo, hi, follow in self._transitions(states):
+            x = lo
+            while x <= hi:
+                while k < len(theirs) and theirs[k][1] < x:
+                    k += 1
+                if k < len(theirs) and theirs[k][0] <= x:
+                    end = min(hi, theirs[k][1])
+                    other_follow = theirs[k][2]
+                else:
+                    end = hi if k == len(theirs) else min(hi, theirs[k][0] - 1)
+                    other_follow = _EMPTY
+                split.append((x, end, follow, other_follow))
+                x = end + 1
+        return split
+
+    def _children(self, states, other, other_states):
+        for lo, hi, follow, other_follow in self._split(states, other, other_states):
+            for x in range(lo, hi + 1):
+                yield chr(x), follow, other_follow
+
+    def matches(self, string):
+        """Whether string is in the language."""
+        states = self.start
+        for c in string:
+            x = ord(c)
+            transitions = self._transitions(states)
+            i = bisect_right(transitions, (x, _UPPER)) - 1
+            if i < 0 or transitions[i][1] < x:
+                return False
+            states = transitions[i][2]
+        return ACCEPT in states
+
+    def generate_sorted(self, exclude=None):
+        """
+        Yields every distinct string of the language in code point order,
+        which is also the byte order of their UTF-8 encodings. Only the
+        path from the empty string to the current one is kept in memory.
+        Strings accepted by the automaton exclude are skipped.
+        """
+        other_start = exclude.start if exclude is not None else _EMPTY
+        if ACCEPT in self.start and ACCEPT not in other_start:
+            yield ""
+
+        stack = [("", self._children(self.start, exclude, other_start))]
+        while stack:
+            prefix, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                continue
+
+            c, states, other_states = child
+            word = prefix + c
+            if ACCEPT in states and ACCEPT not in other_states:
+                yield word
+            if self._transitions(states):
+                stack.append((word, self._children(states, exclude, other_states)))
+
+    def count(self, exclude=None, limit=COUNT_STATE_LIMIT):
+        """
+        Number of distinct strings in the language, leaving out those
+        accepted by the automaton exclude, computed without enumerating
+        them. Raises AutomatonException if more than limit sets of
+        states would have to be visited.
+        """
+        start = (self.start, exclude.start if exclude is not None else _EMPTY)
+        counts = {}
+        stack = [start]
+        while stack:
+            key = stack[-1]
+            if key in counts:
+                stack.pop()
+                continue
+
+            split = self._split(key[0], exclude, key[1])
+            pending = [(s, o) for _, _, s, o in split if (s, o) not in counts]
+            if pending:
+                stack.extend(pending)
+                continue
+
+            total = int(ACCEPT in key[0] and ACCEPT not in key[1])
+            for lo, hi, states, other_states in split:
+                total += (hi - lo + 1) * counts[(states, other_states)]
+            counts[key] = total
+            stack.pop()
+            if len(counts) > limit:
+                raise AutomatonException(
+                    f"Counting needs more than {limit} sets of states."
+                )
+
+        return counts[start]
@@ -0,0 +1,105 @@
+from itertools import islice
+from math import prod
+
+from .definitions import materialized_bytes
+
+PRODUCT = "product"
+ZIP = "zip"
+CYCLE = "cycle"
+STRATEGIES = (PRODUCT, ZIP, CYCLE)
+
+
+class CombineException(Exception):
+    pass
+
+
+class Combination:
+    """
+    A Combination joins the values of several expressions, its columns,
+    into one string per tuple, separated by a separator. The strategy
+    decides which tuples are generated:
+
+    product - every combination, the first column varying slowest
+    zip     - the i-th value of every column, up to the shortest column
+    cycle   - like zip, up to the longest column, shorter columns
+              starting over when they run out
+
+    Columns that are enumerated more than once, every column after the
+    first for product and the shorter columns for cycle, are generated
+    once per call to generate() and kept in memory, regardless of the
+    cache budget. materialized_bytes() estimates the memory they need.
+    """
+
+    def __init__(self, columns, separator=":", strategy=PRODUCT) -> None:
+        if strategy not in STRATEGIES:
+            raise CombineException(f"Unknown combine strategy {strategy}.")
+        self.columns = columns
+        self.separator = separator
+        self.strategy = strategy
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.strategy},{self.separator!r},{self.columns})"
+
+    def size(self):
+        sizes = [c.size() for c in self.columns]
+        if self.strategy == PRODUCT:
+            return prod(sizes)
+        if self.strategy == ZIP or min(sizes) == 0:
+            return min(sizes)
+        return max(sizes)
+
+    def reused_columns(self):
+        """Columns that are kept in memory while generating."""
+        sizes = [c.size() for c in self.columns]
+        if self.strategy == PRODUCT:
+            return self.columns[1:] if min(sizes) > 0 else []
+        if self.strategy == ZIP or min(sizes) == 0:
+            return []
+        return [c for c, size in zip(self.columns, sizes) if size < max(sizes)]
+
+    def materialized_bytes(self):
+        """Approximate memory held by the reused columns while generating."""
+        return sum(materialized_bytes(c) for c in self.reused_columns())
+
+    def generate(self):
+        if self.strategy == PRODUCT:
+            yield from self._product(0, {})
+            return
+
+        if self.strategy == ZIP:
+            rows = zip(*(c.generate() for c in self.columns))
+        else:
+            rows = islice(zip(*(self._cycle(c) for c in self.columns)), self.size())
+
+        for row in rows:
+            yield self.separator.join(row)
+
+    def _product(self, n, tables):
+        column = self.columns[n]
+        if n == 0:
+            values = column.generate()
+        else:
+            if n not in tables:
+                tables[n] = tuple(column.generate())
+            values = tables[n]
+
+        if n == len(self.columns) - 1:
+            yield from values
+        else:
+            for c in values:
+                for r in self._product(n + 1, tables):
+                    yield c + self.separator + r
+
+    def _cycle(self, column):
+        if column.size() == 0:
+            return
+        if column.size() == self.size():
+            yield from column.generate()
+            return
+
+        values = []
+        for c in column.generate():
+            values.append(c)
+            yield c
+        while True:
+            yield from values
@@ -1,4 +1,4 @@
-"""
+r"""
 SPECIAL_CHARACTERS:
 [   - start of character group
 ]   - end of character group
@@ -18,6 +18,12 @@ $   - specify variable, must immediately be followed by (
 
 \   - escape token used to escape Special Characters   
 
+^   - if first inside a character group, negates the group
+
+\d, \w, \s    - digit, word and whitespace character groups
+\D, \W, \S    - their negations
+\xHH, \uHHHH  - character with the given hex code point
+
 Grammar:
 
 ------------------- BASE DEFINITIONS -------------------
@@ -81,7 +87,13 @@ variable_name:
 
 """
 
+import sys
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import product
 from math import prod
+from threading import Lock
+from weakref import WeakKeyDictionary
 
 
 ESCAPE_CHARACTER = "\\"
@@ -103,11 +115,229 @@ OPTIONAL = "?"
 VAR_DECLAR = "$"
 
 DYNAMIC_RANGE_SPECIFIER = "-"
+NEGATE_CLASS = "^"
+
+# Code points a character class can contain, all of Unicode except
+# the surrogates, which cannot be encoded.
+SURROGATES = (0xD800, 0xDFFF)
+UNICODE_INTERVALS = ((0x0, SURROGATES[0] - 1), (SURROGATES[1] + 1, 0x10FFFF))
+
+# Intervals of the \d, \w and \s classes. Their uppercase
+# counterparts are the negated classes.
+SHORTHAND_CLASSES = {
+    "d": ((0x30, 0x39),),
+    "w": ((0x30, 0x39), (0x41, 0x5A), (0x5F, 0x5F), (0x61, 0x7A)),
+    "s": ((0x09, 0x0D), (0x20, 0x20)),
+}
+
+# Escape sequences followed by a fixed number of hex digits.
+HEX_ESCAPES = {"x": 2, "u": 4}
+
+# Upper bound of each UTF-8 encoded length.
+UTF8_LENGTHS = ((0x7F, 1), (0x7FF, 2), (0xFFFF, 3), (0x10FFFF, 4))
+
+# Approximate number of bytes of memory the materialization cache
+# may use at once, across all nodes. A budget of 0 disables it.
+MATERIALIZE_BUDGET = 1 << 26
+
+# Memory used by a cached string besides its characters: the str
+# object header and its slot in the tuple holding it.
+STRING_OVERHEAD = sys.getsizeof("") + 8
+
+
+def materialized_bytes(node):
+    """Approximate memory needed to hold every string of node in a tuple."""
+    return node.byte_size() + node.size() * STRING_OVERHEAD
+
+
+class MaterializationCache:
+    """
+    Nodes that are enumerated repeatedly (the value of a repeated
+    Statement, or any statement after the first in an Expression)
+    have their full output materialized into a tuple the first time,
+    as long as the memory it needs fits in the budget. Later
+    enumerations iterate the tuple instead of running the generator
+    again. Entries are evicted least recently used once the memory
+    held by the cache exceeds the budget. The cost of nodes too large
+    for the budget is remembered without keeping the nodes alive, and
+    checked again against the budget in effect on every call.
+    """
+
+    def __init__(self, budget=MATERIALIZE_BUDGET) -> None:
+        self.budget = budget
+        self.used = 0
+        self._entries = OrderedDict()
+        self._oversized = WeakKeyDictionary()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._oversized.clear()
+            self.used = 0
+
+    def generate(self, node):
+        key = id(node)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+            cost = self._oversized.get(node)
+
+        if cost is None:
+            cost = materialized_bytes(node)
+        if cost > self.budget:
+            with self._lock:
+                self._oversized[node] = cost
+            return node.generate()
+
+        # Nodes are kept alongside their values so their ids cannot be reused.
+        values = tuple(node.generate())
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (node, values, cost)
+                self.used += cost
+            while self.used > self.budget:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.used -= evicted
+
+        return values
+
+
+CACHE = MaterializationCache()
+
+
+def _merge_intervals(intervals):
+    """Sorts inclusive intervals and merges the ones that overlap or touch."""
+    merged = []
+    for lo, hi in sorted(intervals):
+        if merged and lo <= merged[-1][1] + 1:
+            if hi > merged[-1][1]:
+                merged[-1] = (merged[-1][0], hi)
+        else:
+            merged.append((lo, hi))
+    return tuple(merged)
+
+
+def _complement_intervals(intervals):
+    """Code points of UNICODE_INTERVALS that are not in intervals."""
+    complement = []
+    for lo, hi in UNICODE_INTERVALS:
+        for a, b in intervals:
+            if b < lo or a > hi:
+                continue
+            if a > lo:
+                complement.append((lo, a - 1))
+            lo = b + 1
+        if lo <= hi:
+            complement.append((lo, hi))
+    return tuple(complement)
+
+
+def _clip_intervals(intervals):
+    """Parts of intervals inside UNICODE_INTERVALS, dropping surrogates."""
+    clipped = []
+    for lo, hi in intervals:
+        for a, b in UNICODE_INTERVALS:
+            if lo <= b and hi >= a:
+                clipped.append((max(lo, a), min(hi, b)))
+    return tuple(clipped)
+
+
+def _utf8_bytes(lo, hi):
+    """Total UTF-8 encoded length of the code points lo to hi."""
+    total = 0
+    start = 0
+    for end, length in UTF8_LENGTHS:
+        if lo <= end and hi >= start:
+            total += (min(hi, end) - max(lo, start) + 1) * length
+        start = end + 1
+    return total
+
+
+def _product_tables(nodes):
+    """
+    Returns the number of strings and the total number of bytes
+    generated by the cartesian product of each suffix nodes[n:].
+    """
+    sizes = [1] * (len(nodes) + 1)
+    byte_sizes = [0] * (len(nodes) + 1)
+    for n in range(len(nodes) - 1, -1, -1):
+        size = nodes[n].size()
+        sizes[n] = size * sizes[n + 1]
+        byte_sizes[n] = nodes[n].byte_size() * sizes[n + 1] + size * byte_sizes[n + 1]
+    return sizes, byte_sizes
+
+
+def _product_byte_size(nodes):
+    _, byte_sizes = _product_tables(nodes)
+    return byte_sizes[0]
+
+
+def _product_prefix_bytes(nodes, k):
+    """Total number of bytes in the first k strings of the product of nodes."""
+    sizes, byte_sizes = _product_tables(nodes)
+    k = min(max(k, 0), sizes[0])
+    total = 0
+    for n, node in enumerate(nodes):
+        if k == 0:
+            break
+        rest = sizes[n + 1]
+        q, k = divmod(k, rest)
+        total += node.prefix_bytes(q) * rest + q * byte_sizes[n + 1]
+        if k:
+            total += (node.prefix_bytes(q + 1) - node.prefix_bytes(q)) * k
+    return total
+
+
+def _product_range(nodes, start, stop):
+    """
+    Yields the strings at indices start to stop of the cartesian
+    product of nodes, in the same order as Expression.generate.
+    """
+    sizes, _ = _product_tables(nodes)
+    start = max(start, 0)
+    stop = min(stop, sizes[0])
+    if start < stop:
+        yield from _product_range_from(nodes, sizes, start, stop, 0)
+
+
+def _product_range_from(nodes, sizes, start, stop, n):
+    if n == len(nodes):
+        yield ""
+        return
+
+    node = nodes[n]
+    rest = sizes[n + 1]
+    first = start // rest
+    last = (stop - 1) // rest
+
+    # Nodes after the first are enumerated once per prefix.
+    if n > 0 and first == 0 and last == node.size() - 1:
+        values = CACHE.generate(node)
+    else:
+        values = node.generate_range(first, last + 1)
+
+    if n == len(nodes) - 1:
+        yield from values
+        return
+
+    for q, c in enumerate(values, first):
+        lo = max(start - q * rest, 0)
+        hi = min(stop - q * rest, rest)
+        for r in _product_range_from(nodes, sizes, lo, hi, n + 1):
+            yield c + r
 
 
 class Char:
-    def __init__(self, value="") -> None:
+    def __init__(self, value="", escaped=False) -> None:
         self.value = value
+        self.escaped = escaped
 
     def __repr__(self):
         return f"{self.__class__.__name__}({self.value})"
@@ -118,48 +348,95 @@ class Char:
     def generate(self):
         yield self.value
 
+    def generate_range(self, start, stop):
+        if start <= 0 < stop:
+            yield self.value
+
+    def byte_size(self):
+        return len(self.value.encode())
+
+    def prefix_bytes(self, k):
+        return self.byte_size() if k > 0 else 0
+
 
 class DynamicChar:
+    """
+    A character class, stored as sorted and merged inclusive code point
+    intervals. Characters are generated in code point order.
+    """
+
     class RangeException(Exception):
         pass
 
-    def _get_range(self, i, j):
-        if ord(j) < ord(i):
-            raise self.RangeException("Start of range is greater than end of range")
-        return [chr(x) for x in range(ord(i), ord(j) + 1)]
-
-    def __init__(self, expr="") -> None:
-        self.expr = expr
-        chars = list(expr)
-        if len(chars) <= 2:
-            # self.value = list(set(chars))
-            self.value = sorted(list(set(chars)))
-            return
+    def __init__(self, negate=False, intervals=(), label=None) -> None:
+        self.negate = negate
+        self.label = label if label is not None else NEGATE_CLASS if negate else ""
 
-        i = 1
-        to_extend = []
-        while i < len(chars) - 1:
-            if chars[i] == DYNAMIC_RANGE_SPECIFIER:
-                prev = chars[i - 1]
-                next = chars[i + 1]
-                del chars[i - 1 : i + 2]
-                i -= 2
-                to_extend += self._get_range(prev, next)
-            i += 1
-
-        chars += to_extend
-        # self.value = list(set(chars))
-        self.value = sorted(list(set(chars)))
+        merged = _merge_intervals(intervals)
+        if negate:
+            self.intervals = _complement_intervals(merged)
+        else:
+            self.intervals = _clip_intervals(merged)
+
+        # self._starts[i] is the index of the first character of self.intervals[i].
+        self._starts = []
+        size = 0
+        for lo, hi in self.intervals:
+            self._starts.append(size)
+            size += hi - lo + 1
+        self._size = size
+
+    @classmethod
+    def shorthand(cls, c):
+        """Character class for the escape sequence \\c, such as \\d or \\W."""
+        return cls(
+            negate=c.isupper(),
+            intervals=SHORTHAND_CLASSES[c.lower()],
+            label=ESCAPE_CHARACTER + c,
+        )
 
     def __repr__(self):
-        return f'DynamicChar("{self.expr}")'
+        return f'DynamicChar("{self.label}")'
+
+    def __getitem__(self, i):
+        if not 0 <= i < self._size:
+            raise IndexError("DynamicChar index out of range")
+        n = bisect_right(self._starts, i) - 1
+        return chr(self.intervals[n][0] + i - self._starts[n])
 
     def size(self):
-        return len(self.value)
+        return self._size
 
     def generate(self):
-        for c in self.value:
-            yield c
+        for lo, hi in self.intervals:
+            for x in range(lo, hi + 1):
+                yield chr(x)
+
+    def generate_range(self, start, stop):
+        start = max(start, 0)
+        stop = min(stop, self._size)
+        if start >= stop:
+            return
+
+        n = bisect_right(self._starts, start) - 1
+        for (lo, hi), first in zip(self.intervals[n:], self._starts[n:]):
+            if first >= stop:
+                break
+            begin = lo + max(start - first, 0)
+            end = min(hi, lo + stop - first - 1)
+            for x in range(begin, end + 1):
+                yield chr(x)
+
+    def byte_size(self):
+        return self.prefix_bytes(self._size)
+
+    def prefix_bytes(self, k):
+        total = 0
+        for (lo, hi), first in zip(self.intervals, self._starts):
+            if first >= k:
+                break
+            total += _utf8_bytes(lo, min(hi, lo + k - first - 1))
+        return total
 
 
 class Variable:
@@ -187,6 +464,15 @@ class Join:
     def generate(self):
         yield from self.expression.generate()
 
+    def generate_range(self, start, stop):
+        yield from self.expression.generate_range(start, stop)
+
+    def byte_size(self):
+        return self.expression.byte_size()
+
+    def prefix_bytes(self, k):
+        return self.expression.prefix_bytes(k)
+
 
 class Or:
     """
@@ -207,6 +493,22 @@ class Or:
         yield from self.value[0].generate()
         yield from self.value[1].generate()
 
+    def generate_range(self, start, stop):
+        n = self.value[0].size()
+        if start < n:
+            yield from self.value[0].generate_range(start, min(stop, n))
+        if stop > n:
+            yield from self.value[1].generate_range(max(start - n, 0), stop - n)
+
+    def byte_size(self):
+        return self.value[0].byte_size() + self.value[1].byte_size()
+
+    def prefix_bytes(self, k):
+        n = self.value[0].size()
+        if k <= n:
+            return self.value[0].prefix_bytes(k)
+        return self.value[0].byte_size() + self.value[1].prefix_bytes(k - n)
+
 
 class Expression:
     """
@@ -232,16 +534,40 @@ class Expression:
             yield ""
             return
 
+        # Every statement after the first is enumerated once per prefix.
+        if n == 0:
+            values = self.statements[n].generate()
+        else:
+            values = CACHE.generate(self.statements[n])
+
         if n == len(self.statements) - 1:
-            yield from self.statements[n].generate()
+            yield from values
         else:
-            for c in self.statements[n].generate():
+            for c in values:
                 for r in self._generate(n + 1):
                     yield c + r
 
+    def generate_range(self, start, stop):
+        """
+        Yields the strings that generate() would yield at indices
+        start to stop, without enumerating the ones before start.
+        """
+        if start <= 0 and stop >= self.size():
+            yield from self.generate()
+        else:
+            yield from _product_range(self.statements, start, stop)
+
     def size(self):
         return prod(q.size() for q in self.statements)
 
+    def byte_size(self):
+        """Total number of encoded bytes over all generated strings."""
+        return _product_byte_size(self.statements)
+
+    def prefix_bytes(self, k):
+        """Total number of encoded bytes over the first k generated strings."""
+        return _product_prefix_bytes(self.statements, k)
+
     def push(self, item):
         """Push an item onto the expression's statement list"""
         self.statements.append(item)
@@ -273,17 +599,67 @@ class Statement:
         )
 
     def generate(self):
+        if self.quantifier.begin() == 1 and self.quantifier.size() == 1:
+            yield from self.value.generate()
+            return
+
         for count in self.quantifier.generate():
             yield from self._generate(count)
 
+    def generate_range(self, start, stop):
+        if start <= 0 and stop >= self.size():
+            yield from self.generate()
+            return
+
+        offset = 0
+        for count, group in self._groups():
+            if offset >= stop:
+                break
+            if start < offset + group:
+                yield from _product_range(
+                    [self.value] * count, start - offset, stop - offset
+                )
+            offset += group
+
+    def byte_size(self):
+        return self.prefix_bytes(self.size())
+
+    def prefix_bytes(self, k):
+        total = 0
+        offset = 0
+        value_bytes = self.value.byte_size()
+        for count, group in self._groups():
+            if offset >= k:
+                break
+            if k >= offset + group:
+                if count > 0:
+                    total += count * self.value.size() ** (count - 1) * value_bytes
+            else:
+                total += _product_prefix_bytes([self.value] * count, k - offset)
+            offset += group
+        return total
+
+    def _groups(self):
+        """Yields each repetition count with the number of strings it generates."""
+        size = self.value.size()
+        for count in self.quantifier.generate():
+            yield count, size**count
+
     def _generate(self, n):
+        # The value is enumerated again for every prefix and every
+        # repetition count, so it is served from the cache.
         if n == 0:
             yield ""
-        elif n == 1:
-            for val in self.value.generate():
-                yield val
+            return
+
+        values = CACHE.generate(self.value)
+        if n == 1:
+            yield from values
+        elif isinstance(values, tuple):
+            for combination in product(values, repeat=n):
+                yield "".join(combination)
         else:
-            for c in self.value.generate():
+            for c in values:
                 for r in self._generate(n - 1):
                     yield c + r
 
@@ -339,6 +715,6 @@ class RangeQuantifier(Quantifier):
 
 
 if __name__ == "__main__":
-    q = DynamicChar("aa-zA-Z")
-    print(q.value)
+    q = DynamicChar(intervals=((ord("a"), ord("z")), (ord("A"), ord("Z"))))
+    print(q.intervals)
     assert q.size() == 26 * 2
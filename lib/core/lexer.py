@@ -1,6 +1,15 @@
 import sys
+from string import hexdigits
 from .reader import Reader
-from .definitions import ESCAPE_CHARACTER, SPECIAL_CHARACTERS, Char
+from .definitions import (
+    ESCAPE_CHARACTER,
+    HEX_ESCAPES,
+    SHORTHAND_CLASSES,
+    SPECIAL_CHARACTERS,
+    SURROGATES,
+    Char,
+    DynamicChar,
+)
 
 from . import DEBUG
 _print = print
@@ -30,7 +39,12 @@ class Lexer:
 
             if c == ESCAPE_CHARACTER:
                 i, c = self.reader.consume()
-                yield Char(c)
+                if c.lower() in SHORTHAND_CLASSES:
+                    yield DynamicChar.shorthand(c)
+                elif c in HEX_ESCAPES:
+                    yield Char(self._consume_hex(i, HEX_ESCAPES[c]), escaped=True)
+                else:
+                    yield Char(c, escaped=True)
 
             elif c not in SPECIAL_CHARACTERS:
                 yield Char(c)
@@ -38,6 +52,24 @@ class Lexer:
             elif c in SPECIAL_CHARACTERS:
                 yield c
 
+    def _consume_hex(self, i, count):
+        digits = ""
+        while len(digits) < count and not self.reader.EOF():
+            _, c = self.reader.consume()
+            digits += c
+        # int() also accepts signs, underscores and whitespace.
+        if len(digits) != count or any(c not in hexdigits for c in digits):
+            raise LexerException(
+                f"Expected {count} hex digits after escape at index {i}, got {digits}"
+            )
+        code = int(digits, 16)
+
+        if SURROGATES[0] <= code <= SURROGATES[1]:
+            raise LexerException(
+                f"Escape at index {i} is a surrogate, which can not be encoded"
+            )
+        return chr(code)
+
     def EOF(self):
         if DEBUG:
             print(f"[INFO] Checked EOF at index {self.i}.")
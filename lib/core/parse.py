@@ -10,9 +10,11 @@ from .definitions import (
     CLOSE_PAREN,
     Char,
     CountQuantifier,
+    DYNAMIC_RANGE_SPECIFIER,
     DynamicChar,
     Expression,
     Join,
+    NEGATE_CLASS,
     OPEN_BRACK,
     OPEN_CURL,
     OPEN_PAREN,
@@ -74,6 +76,9 @@ class Parser:
 
         elif c == OPEN_BRACK:
             value = self._parse_dynamic_char()
+
+        elif isinstance(c, DynamicChar):
+            value = self._parse_shorthand()
         else:
             raise ParserException(f"Unexpected character at index {i}, got {c}.")
 
@@ -97,20 +102,42 @@ class Parser:
 
         return c
 
+    def _parse_shorthand(self) -> DynamicChar:
+        i, c = self.Lexer.consume()
+        if not isinstance(c, DynamicChar):
+            raise ParserException("how tf")
+
+        return c
+
     def _parse_dynamic_char(self) -> DynamicChar:
+        """
+        Parses starting from [ until ]. An unescaped ^ right after
+        the [ negates the class, and shorthand classes such as \\d
+        are merged into it.
+        """
         i, c = self.Lexer.consume()
-        value = ""
+        items = []
+        label = ""
+        negate = False
         if c != OPEN_BRACK:
             raise ParserException("how tf")
 
+        if not self.Lexer.EOF():
+            i, c = self.Lexer.peek()
+            if isinstance(c, Char) and c.value == NEGATE_CLASS and not c.escaped:
+                self.Lexer.consume()
+                negate = True
+                label += c.value
+
         while not self.Lexer.EOF():
             i, c = self.Lexer.peek()
             if c == CLOSE_BRACK:
                 self.Lexer.consume()
                 break
-            elif isinstance(c, Char):
+            elif isinstance(c, Char) or isinstance(c, DynamicChar):
                 i, c = self.Lexer.consume()
-                value += c.value
+                items.append(c)
+                label += c.label if isinstance(c, DynamicChar) else c.value
             else:
                 raise ParserException(
                     f"Unexpected character in class expression, got {c} at index {i}"
@@ -119,7 +146,41 @@ class Parser:
         else:
             raise ParserException("Invalid class expression, closing ] not found.")
 
-        return DynamicChar(value)
+        return DynamicChar(negate, self._class_intervals(items), label)
+
+    def _class_intervals(self, items):
+        """
+        Turns the characters and shorthand classes inside [ ] into code
+        point intervals. Only an unescaped - between two characters
+        forms a range.
+        """
+        intervals = []
+        i = 0
+        while i < len(items):
+            c = items[i]
+            if isinstance(c, DynamicChar):
+                intervals += c.intervals
+                i += 1
+                continue
+
+            if (
+                i + 2 < len(items)
+                and isinstance(items[i + 1], Char)
+                and items[i + 1].value == DYNAMIC_RANGE_SPECIFIER
+                and not items[i + 1].escaped
+                and isinstance(items[i + 2], Char)
+            ):
+                lo, hi = ord(c.value), ord(items[i + 2].value)
+                if hi < lo:
+                    raise DynamicChar.RangeException(
+                        "Start of range is greater than end of range"
+                    )
+                intervals.append((lo, hi))
+                i += 3
+            else:
+                intervals += [(ord(x), ord(x)) for x in c.value]
+                i += 1
+        return intervals
 
     def _parse_quantifier(self) -> Quantifier:
         """
@@ -0,0 +1,145 @@
+# Per node profiling of Fuzex expressions. Profiling is opt in: a
+# Profiler shadows the generate method of every node in the tree with
+# an instrumented one on the instance, so expressions that are not
+# profiled run the plain class methods with no extra cost.
+
+from time import perf_counter
+
+from .combine import Combination
+from .definitions import Char, DynamicChar, Expression, Join, Or, Statement
+
+# Longest node label shown in the annotated tree.
+LABEL_WIDTH = 60
+
+
+def _children(node):
+    if isinstance(node, Expression):
+        return node.statements
+    if isinstance(node, Statement):
+        return [node.value]
+    if isinstance(node, Join):
+        return [node.expression]
+    if isinstance(node, Or):
+        return node.value
+    if isinstance(node, Combination):
+        return node.columns
+    return []
+
+
+def _label(node):
+    """
+    Short description of the node itself, leaving out its children,
+    which are shown on their own lines.
+    """
+    if isinstance(node, Expression):
+        return f"{len(node.statements)} statements"
+    if isinstance(node, Statement):
+        return repr(node.quantifier)
+    if isinstance(node, DynamicChar):
+        return f"[{node.label}]"
+    if isinstance(node, Char):
+        return repr(node.value)
+    if isinstance(node, Combination):
+        return f"{node.strategy} {node.separator!r}"
+    if isinstance(node, (Join, Or)):
+        return ""
+    return repr(node)
+
+
+class NodeStats:
+    """
+    Counters collected for a single node. Times are in seconds, and
+    inclusive time counts the time spent in the node's children.
+    """
+
+    def __init__(self, node, children) -> None:
+        self.node = node
+        self.children = children
+        self.calls = 0
+        self.items = 0
+        self.bytes = 0
+        self.inclusive = 0.0
+        self.child_time = 0.0
+
+    @property
+    def exclusive(self):
+        return self.inclusive - self.child_time
+
+    def to_dict(self):
+        return {
+            "node": repr(self.node),
+            "type": self.node.__class__.__name__,
+            "label": _label(self.node),
+            "calls": self.calls,
+            "items": self.items,
+            "bytes": self.bytes,
+            "inclusive": self.inclusive,
+            "exclusive": self.exclusive,
+            "children": [c.to_dict() for c in self.children],
+        }
+
+
+class Profiler:
+    """
+    Records, for every node of an expression, how many times generate
+    was called, how many items and bytes it yielded, and the time
+    spent producing them.
+    """
+
+    def __init__(self, expression) -> None:
+        self._stack = []
+        self.root = self._instrument(expression)
+
+    def _instrument(self, node):
+        stats = NodeStats(node, [self._instrument(c) for c in _children(node)])
+        node.generate = self._wrap(node.generate, stats)
+        return stats
+
+    def _wrap(self, generate, stats):
+        stack = self._stack
+
+        def profiled():
+            stats.calls += 1
+            values = generate()
+            while True:
+                stack.append(stats)
+                start = perf_counter()
+                try:
+                    item = next(values)
+                except StopIteration:
+                    break
+                finally:
+                    elapsed = perf_counter() - start
+                    stack.pop()
+                    stats.inclusive += elapsed
+                    if stack:
+                        stack[-1].child_time += elapsed
+
+                stats.items += 1
+                stats.bytes += len(item.encode(errors="surrogatepass"))
+                yield item
+
+        return profiled
+
+    def to_dict(self):
+        return self.root.to_dict()
+
+    def format_tree(self):
+        """Annotated tree with one line per node, children indented."""
+        lines = [
+            f"{'calls':>10} {'items':>12} {'bytes':>14} {'incl(s)':>10} {'excl(s)':>10}  type label"
+        ]
+        self._format(self.root, 0, lines)
+        return "\n".join(lines)
+
+    def _format(self, stats, depth, lines):
+        label = _label(stats.node)
+        if len(label) > LABEL_WIDTH:
+            label = label[: LABEL_WIDTH - 3] + "..."
+        lines.append(
+            f"{stats.calls:>10} {stats.items:>12} {stats.bytes:>14} "
+            f"{stats.inclusive:>10.4f} {stats.exclusive:>10.4f}  "
+            f"{'  ' * depth}{stats.node.__class__.__name__} {label}".rstrip()
+        )
+        for child in stats.children:
+            self._format(child, depth + 1, lines)
@@ -0,0 +1,66 @@
+import os
+import sys
+
+sys.path.insert(0, "..")
+
+import unittest
+from unittest import TestCase
+
+from parse import *
+from automaton import *
+
+
+class TestAutomaton(TestCase):
+    sorted_ex = [
+        r"ab{,2}c",
+        r"a?a?",
+        r"x(ab?[cd]){0,3}y",
+        r"[a-c]?[b-d]{0,2}\x00?",
+        r"é[αβ]{1,2}(xy)?",
+        r"[]a",
+    ]
+
+    def test_sorted(self):
+        for e in self.sorted_ex:
+            exp = Parser(e).parse()
+            expected = sorted(set(exp.generate()), key=lambda out: out.encode())
+            output = list(Automaton(exp).generate_sorted())
+            self.assertEqual(output, expected, f"Expected sorted output on input {e}.")
+
+    since_ex = [
+        (r"[a-c]{1,3}", r"[ab]{1,2}"),
+        (r"a?a?b{0,2}", r"ab?"),
+        (r"x(ab?[cd]){0,3}y", r"x(a[cd]){1,2}y"),
+        (r"ab", r"ab"),
+        (r"a?", r""),
+    ]
+
+    def test_since(self):
+        for new, old in self.since_ex:
+            new_out = set(Parser(new).parse().generate())
+            old_out = set(Parser(old).parse().generate())
+            expected = sorted(new_out - old_out, key=lambda out: out.encode())
+
+            automaton = Automaton(Parser(new).parse())
+            previous = Automaton(Parser(old).parse())
+
+            for out in new_out:
+                self.assertTrue(automaton.matches(out), f"{out} should match {new}.")
+                self.assertEqual(previous.matches(out), out in old_out, f"On {out}.")
+
+            self.assertEqual(list(automaton.generate_sorted(previous)), expected)
+            self.assertEqual(automaton.count(previous), len(expected))
+            self.assertEqual(automaton.count(), len(new_out))
+
+    def test_count(self):
+        new = Automaton(Parser(r"[a-z0-9]{1,8}").parse())
+        old = Automaton(Parser(r"[a-z]{1,6}").parse())
+        expected = sum(36**i for i in range(1, 9)) - sum(26**i for i in range(1, 7))
+        self.assertEqual(new.count(old), expected)
+
+        with self.assertRaises(AutomatonException):
+            new.count(old, limit=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
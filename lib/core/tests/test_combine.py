@@ -0,0 +1,73 @@
+import os
+import sys
+
+sys.path.insert(0, "..")
+
+import unittest
+from unittest import TestCase
+
+from parse import *
+from combine import *
+from definitions import CACHE
+
+
+class TestCombine(TestCase):
+    columns = [r"u[12]", r"p[ab]{1,2}"]
+    combine_out = {
+        PRODUCT: [u + ":" + p for u in ["u1", "u2"] for p in ["pa", "pb", "paa", "pab", "pba", "pbb"]],
+        ZIP: ["u1:pa", "u2:pb"],
+        CYCLE: ["u1:pa", "u2:pb", "u1:paa", "u2:pab", "u1:pba", "u2:pbb"],
+    }
+
+    def test_combine(self):
+        for strategy, o in self.combine_out.items():
+            combination = Combination(
+                [Parser(e).parse() for e in self.columns], ":", strategy
+            )
+            self.assertEqual(combination.size(), len(o), f"Size of {strategy}.")
+            self.assertEqual(list(combination.generate()), o, f"Output of {strategy}.")
+
+    def test_empty_column(self):
+        for strategy in STRATEGIES:
+            combination = Combination(
+                [Parser(e).parse() for e in [r"[ab]", r"[]"]], "=", strategy
+            )
+            self.assertEqual(combination.size(), 0)
+            self.assertEqual(list(combination.generate()), [])
+
+    def test_reused_columns(self):
+        columns = [Parser(e).parse() for e in [r"[ab]", r"[cd]{1,2}", r"e?"]]
+        calls = []
+
+        def counted(column):
+            generate = column.generate
+
+            def wrapper():
+                calls.append(column)
+                return generate()
+
+            return wrapper
+
+        for column in columns:
+            column.generate = counted(column)
+
+        budget = CACHE.budget
+        CACHE.budget = 0
+        try:
+            for strategy in STRATEGIES:
+                calls.clear()
+                combination = Combination(columns, ":", strategy)
+                self.assertEqual(len(list(combination.generate())), combination.size())
+                for column in columns:
+                    self.assertEqual(calls.count(column), 1, strategy)
+        finally:
+            CACHE.budget = budget
+
+        self.assertEqual(
+            Combination(columns, ":", CYCLE).reused_columns(), [columns[0], columns[2]]
+        )
+        self.assertEqual(Combination(columns, ":", ZIP).materialized_bytes(), 0)
+        self.assertGreater(Combination(columns, ":", PRODUCT).materialized_bytes(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,12 +13,27 @@ from lexer import *
 class TestLexer(TestCase):
     static_ex = [r"1234", r"12\$34a", "\$\[\]\(\)\(\(\(", r"\\"]
     static_ex_size = [4, 6, 8, 1]
+    escape_ex = [r"\d\W", r"\x41\u00e9", r"[^\s]"]
+    escape_ex_size = [2, 2, 4]
 
     def test_static(self):
         for e, s in zip(self.static_ex, self.static_ex_size):
             L = Lexer(e)
             self.assertEqual(len(L), s, f"Expected size {s} on input {e}, got {len(L)}")
 
+    def test_escape(self):
+        for e, s in zip(self.escape_ex, self.escape_ex_size):
+            L = Lexer(e)
+            self.assertEqual(len(L), s, f"Expected size {s} on input {e}, got {len(L)}")
+
+        with self.assertRaises(LexerException):
+            Lexer(r"\x4")
+        with self.assertRaises(LexerException):
+            Lexer(r"\ud800")
+        for e in [r"\x+f", r"\u 0a1", r"\x_1", r"\u-0a1"]:
+            with self.assertRaises(LexerException, msg=f"On input {e}."):
+                Lexer(e)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,3 +1,4 @@
+import gc
 import os
 import sys
 
@@ -7,6 +8,7 @@ import unittest
 from unittest import TestCase
 
 from parse import *
+from definitions import CACHE
 
 
 class TestParse(TestCase):
@@ -24,6 +26,28 @@ class TestParse(TestCase):
         sorted(["$", "["]),
     ]
 
+    class_ex = [
+        r"\d",
+        r"[\da-c]",
+        r"[\^a]",
+        r"\x41[\u00e9]",
+        r"[^\x00-\x7f]",
+        r"[a\x2dc]",
+        r"[a\-c]",
+        r"[\ud7ff-\ue000]",
+    ]
+    class_ex_size = [10, 13, 2, 1, 0x10FFFF + 1 - 0x800 - 0x80, 3, 3, 2]
+    class_ex_out = [
+        [str(i) for i in range(10)],
+        [str(i) for i in range(10)] + ["a", "b", "c"],
+        ["^", "a"],
+        ["A\u00e9"],
+        None,
+        ["-", "a", "c"],
+        ["-", "a", "c"],
+        ["\ud7ff", "\ue000"],
+    ]
+
     def test_static(self):
         for e, s, o in zip(self.static_ex, self.static_ex_size, self.static_ex_out):
             P = Parser(e)
@@ -55,6 +79,72 @@ class TestParse(TestCase):
                 f"Expected size {s}, generated only {len(output)} on input {e}.",
             )
 
+    def test_class(self):
+        for e, s, o in zip(self.class_ex, self.class_ex_size, self.class_ex_out):
+            exp = Parser(e).parse()
+            self.assertEqual(exp.size(), s, f"Expected size {s} on input {e}.")
+            if o is not None:
+                self.assertEqual(list(exp.generate()), o, f"On input {e}.")
+
+        negated = Parser(r"[^a-y]").parse().statements[0].value
+        self.assertEqual(negated[0], "\x00")
+        self.assertEqual(negated[ord("a")], "z")
+        self.assertEqual(list(negated.generate_range(96, 99)), ["`", "z", "{"])
+
+    cached_ex = [r"([a-z][0-9]){2}", r"x(ab?[cd]){0,3}y", r"[ab]{,3}c?[de]"]
+
+    def test_cache(self):
+        for e in self.cached_ex:
+            budget = CACHE.budget
+            try:
+                CACHE.budget = 0
+                CACHE.clear()
+                expected = list(Parser(e).parse().generate())
+                CACHE.budget = 4096
+                output = list(Parser(e).parse().generate())
+                self.assertLessEqual(CACHE.used, CACHE.budget)
+            finally:
+                CACHE.budget = budget
+                CACHE.clear()
+
+            self.assertEqual(output, expected, f"Cached output differs on input {e}.")
+
+    def test_cache_oversized(self):
+        budget = CACHE.budget
+        try:
+            CACHE.budget = 100
+            CACHE.clear()
+            for _ in range(50):
+                list(Parser(r"a[a-z]{2}").parse().generate())
+            gc.collect()
+            self.assertLessEqual(len(CACHE._oversized), 2)
+
+            exp = Parser(r"a[a-z]{2}").parse()
+            list(exp.generate())
+            CACHE.budget = 1 << 20
+            list(exp.generate())
+            self.assertGreater(len(CACHE), 0)
+        finally:
+            CACHE.budget = budget
+            CACHE.clear()
+
+    range_ex = [r"ab{,2}c{3,4}", r"([a-z][0-9]){2}", r"x(ab?[cd]){0,3}y", r"\u00e9[ab]{1,2}"]
+
+    def test_range(self):
+        for e in self.range_ex:
+            exp = Parser(e).parse()
+            full = list(exp.generate())
+            lengths = [len(out.encode()) for out in full]
+
+            self.assertEqual(exp.byte_size(), sum(lengths), f"On input {e}.")
+            for k in range(0, len(full) + 1, 7):
+                self.assertEqual(exp.prefix_bytes(k), sum(lengths[:k]), f"On input {e}.")
+                self.assertEqual(
+                    list(exp.generate_range(k, k + 11)),
+                    full[k : k + 11],
+                    f"Expected lines {k} to {k + 11} on input {e}.",
+                )
+
 
 if __name__ == "__main__":
     unittest.main()
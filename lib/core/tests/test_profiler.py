@@ -0,0 +1,51 @@
+import os
+import sys
+
+sys.path.insert(0, "..")
+
+import unittest
+from unittest import TestCase
+
+from parse import *
+from profiler import *
+
+
+class TestProfiler(TestCase):
+    profile_ex = [r"ab{,2}c", r"([a-z][0-9]){2}", r"x(ab?[cd]){0,3}y"]
+
+    def test_profile(self):
+        for e in self.profile_ex:
+            expected = list(Parser(e).parse().generate())
+
+            exp = Parser(e).parse()
+            profiler = Profiler(exp)
+            output = list(exp.generate())
+            root = profiler.to_dict()
+
+            self.assertEqual(output, expected, f"Profiled output differs on input {e}.")
+            self.assertEqual(root["calls"], 1)
+            self.assertEqual(root["items"], len(expected))
+            self.assertEqual(root["bytes"], sum(len(out) for out in expected))
+            self.assertEqual(len(root["children"]), len(exp.statements))
+            self.assertGreaterEqual(root["inclusive"], root["exclusive"])
+
+    def test_format_tree(self):
+        exp = Parser(r"x(ab?[cd]){0,3}y").parse()
+        profiler = Profiler(exp)
+        list(exp.generate())
+        lines = profiler.format_tree().splitlines()[1:]
+
+        nodes = [line.split()[5:] for line in lines]
+        self.assertEqual(nodes[0], ["Expression", "3", "statements"])
+        self.assertIn(["Statement", "{0,3}"], nodes)
+        self.assertIn(["Join"], nodes)
+        self.assertIn(["DynamicChar", "[cd]"], nodes)
+        self.assertEqual(profiler.to_dict()["children"][1]["label"], "{0,3}")
+
+    def test_unprofiled(self):
+        exp = Parser(r"[ab]{2}").parse()
+        self.assertNotIn("generate", vars(exp))
+
+
+if __name__ == "__main__":
+    unittest.main()
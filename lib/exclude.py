@@ -0,0 +1,338 @@
+# Exclusion lists for filtering generated lines against very large
+# wordlists. The wordlist is never loaded into memory. Instead it is
+# turned, once, into an on-disk index that is memory mapped for lookups
+# and reused as long as the wordlist does not change. The index is kept
+# next to the wordlist, or in a cache directory when that is not
+# writable. Lines may end with either \n or \r\n.
+#
+# SortedIndex is exact. The wordlist is sorted with an external merge
+# sort and stored as an array of offsets followed by the sorted entries,
+# so a lookup is a binary search over the mapped file.
+#
+# BloomFilter is approximate. It never misses an excluded line, but also
+# excludes roughly a configurable fraction of the lines that should pass.
+
+import heapq
+import math
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from hashlib import blake2b, sha256
+
+INDEX_SUFFIX = ".fzxidx"
+BLOOM_SUFFIX = ".fzxbloom"
+
+# Approximate memory used to sort a run of the wordlist while building
+# an index. Each line costs its length plus LINE_OVERHEAD, the size of
+# an empty bytes object and its slot in the list of lines.
+RUN_BYTES = 1 << 26
+LINE_OVERHEAD = sys.getsizeof(b"") + 8
+
+# Offsets written to disk at once while building an index.
+OFFSET_BATCH = 1 << 16
+
+_INDEX_HEADER = struct.Struct("<8sQQQ")
+_INDEX_MAGIC = b"FZXIDX2\0"
+_BLOOM_HEADER = struct.Struct("<8sQQdQQ")
+_BLOOM_MAGIC = b"FZXBLM2\0"
+_OFFSET = struct.Struct("<Q")
+
+
+class ExcludeException(Exception):
+    pass
+
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "fuzex")
+
+
+def _index_paths(source, suffix, index_dir=None):
+    """Locations where the index of source may be kept, in order of preference."""
+    source = os.path.abspath(source)
+    digest = sha256(os.fsencode(source)).hexdigest()[:16]
+    name = f"{os.path.basename(source)}-{digest}{suffix}"
+    if index_dir is not None:
+        return [os.path.join(index_dir, name)]
+    return [source + suffix, os.path.join(_cache_dir(), name)]
+
+
+def _write_atomic(path, write):
+    """
+    Calls write with a new temporary file next to path, then moves it
+    to path, so concurrent builders never see each other's partial files.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    partial = tempfile.NamedTemporaryFile(
+        dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp", delete=False
+    )
+    try:
+        with partial:
+            write(partial)
+        os.replace(partial.name, path)
+    except BaseException:
+        if os.path.exists(partial.name):
+            os.unlink(partial.name)
+        raise
+
+
+def _read_lines(path):
+    with open(path, "rb") as f:
+        for line in f:
+            if line.endswith(b"\r\n"):
+                yield line[:-2]
+            elif line.endswith(b"\n"):
+                yield line[:-1]
+            else:
+                yield line
+
+
+def _write_run(lines, directory):
+    lines.sort()
+    run = tempfile.TemporaryFile(dir=directory)
+    previous = None
+    for line in lines:
+        if line != previous:
+            run.write(line + b"\n")
+            previous = line
+    run.seek(0)
+    return run
+
+
+def _run_lines(run):
+    for line in run:
+        yield line[:-1]
+
+
+def _sorted_runs(path, directory):
+    runs = []
+    lines = []
+    pending = 0
+    for line in _read_lines(path):
+        lines.append(line)
+        pending += len(line) + LINE_OVERHEAD
+        if pending >= RUN_BYTES:
+            runs.append(_write_run(lines, directory))
+            lines = []
+            pending = 0
+    if lines or not runs:
+        runs.append(_write_run(lines, directory))
+    return runs
+
+
+def _open_index(path, stamp, header, magic):
+    """Maps an index file, or returns None if it is missing or stale."""
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None, None
+
+    if len(mm) < header.size:
+        mm.close()
+        return None, None
+    fields = header.unpack_from(mm, 0)
+    if fields[0] != magic or fields[1:3] != stamp:
+        mm.close()
+        return None, None
+    return mm, fields
+
+
+def _load_index(source, paths, header, magic, build, valid=None):
+    """
+    Maps the first valid index in paths, or builds one at the first of
+    paths that can be written. Returns the path, the mapping and the
+    header fields.
+    """
+    stamp = _source_stamp(source)
+    for path in paths:
+        mm, fields = _open_index(path, stamp, header, magic)
+        if mm is not None and (valid is None or valid(fields)):
+            return path, mm, fields
+        if mm is not None:
+            mm.close()
+
+    errors = []
+    for path in paths:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            build(path)
+        except OSError as e:
+            errors.append(str(e))
+            continue
+        mm, fields = _open_index(path, stamp, header, magic)
+        if mm is not None:
+            return path, mm, fields
+
+    raise ExcludeException(
+        f"Could not write an index for {source}: {'; '.join(errors)}"
+    )
+
+
+class SortedIndex:
+    """
+    Exact membership test against a wordlist, backed by a sorted and
+    memory mapped index file.
+    """
+
+    def __init__(self, source, path=None, index_dir=None) -> None:
+        self.source = source
+        paths = [path] if path else _index_paths(source, INDEX_SUFFIX, index_dir)
+        self.path, self._mm, fields = _load_index(
+            source,
+            paths,
+            _INDEX_HEADER,
+            _INDEX_MAGIC,
+            lambda path: self.build(source, path),
+        )
+        self._count = fields[3]
+        self._data = _INDEX_HEADER.size + (self._count + 1) * _OFFSET.size
+
+    @staticmethod
+    def build(source, path):
+        """Writes the sorted, deduplicated index of source to path."""
+        stamp = _source_stamp(source)
+        directory = os.path.dirname(os.path.abspath(path))
+        runs = _sorted_runs(source, directory)
+
+        count = 0
+        offset = 0
+        batch = [0]
+        with tempfile.TemporaryFile(dir=directory) as data, tempfile.TemporaryFile(
+            dir=directory
+        ) as offsets:
+            previous = None
+            for line in heapq.merge(*(_run_lines(run) for run in runs)):
+                if line == previous:
+                    continue
+                previous = line
+                data.write(line)
+                offset += len(line)
+                batch.append(offset)
+                count += 1
+                if len(batch) >= OFFSET_BATCH:
+                    offsets.write(struct.pack(f"<{len(batch)}Q", *batch))
+                    batch = []
+            offsets.write(struct.pack(f"<{len(batch)}Q", *batch))
+
+            for run in runs:
+                run.close()
+
+            def write(f):
+                f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, *stamp, count))
+                for part in (offsets, data):
+                    part.seek(0)
+                    shutil.copyfileobj(part, f)
+
+            _write_atomic(path, write)
+
+    def __len__(self):
+        return self._count
+
+    def _entry(self, i):
+        start = _OFFSET.unpack_from(self._mm, _INDEX_HEADER.size + i * _OFFSET.size)[0]
+        end = _OFFSET.unpack_from(
+            self._mm, _INDEX_HEADER.size + (i + 1) * _OFFSET.size
+        )[0]
+        return self._mm[self._data + start : self._data + end]
+
+    def __contains__(self, line):
+        key = line.encode(errors="surrogatepass")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = self._entry(mid)
+            if entry < key:
+                lo = mid + 1
+            elif entry > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def close(self):
+        self._mm.close()
+
+
+class BloomFilter:
+    """
+    Approximate membership test against a wordlist, backed by a memory
+    mapped Bloom filter with a false positive rate of fp_rate.
+    """
+
+    def __init__(self, source, fp_rate, path=None, index_dir=None) -> None:
+        self.source = source
+        paths = [path] if path else _index_paths(source, BLOOM_SUFFIX, index_dir)
+        self.path, self._mm, fields = _load_index(
+            source,
+            paths,
+            _BLOOM_HEADER,
+            _BLOOM_MAGIC,
+            lambda path: self.build(source, path, fp_rate),
+            lambda fields: fields[3] == fp_rate,
+        )
+        self.fp_rate = fp_rate
+        self._bits = fields[4]
+        self._hashes = fields[5]
+
+    @staticmethod
+    def _indices(key, bits, hashes):
+        digest = blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(hashes):
+            yield (h1 + i * h2) % bits
+
+    @staticmethod
+    def build(source, path, fp_rate):
+        """Writes a Bloom filter of the lines of source to path."""
+        if not 0 < fp_rate < 1:
+            raise ExcludeException("The false positive rate must be between 0 and 1.")
+
+        stamp = _source_stamp(source)
+        count = sum(1 for _ in _read_lines(source))
+        bits = max(8, math.ceil(-count * math.log(fp_rate) / math.log(2) ** 2))
+        hashes = max(1, round(bits / max(count, 1) * math.log(2)))
+        header = _BLOOM_HEADER.pack(_BLOOM_MAGIC, *stamp, fp_rate, bits, hashes)
+
+        def write(f):
+            f.write(header)
+            f.truncate(len(header) + (bits + 7) // 8)
+            with mmap.mmap(f.fileno(), 0) as mm:
+                for line in _read_lines(source):
+                    for i in BloomFilter._indices(line, bits, hashes):
+                        mm[len(header) + i // 8] |= 1 << (i % 8)
+                mm.flush()
+
+        _write_atomic(path, write)
+
+    def __contains__(self, line):
+        key = line.encode(errors="surrogatepass")
+        for i in self._indices(key, self._bits, self._hashes):
+            if not self._mm[_BLOOM_HEADER.size + i // 8] & (1 << (i % 8)):
+                return False
+        return True
+
+    def close(self):
+        self._mm.close()
+
+
+def open_exclusion(source, fp_rate=None, index_dir=None):
+    """
+    Returns an object supporting `line in exclusion` for the lines of
+    the file source, exact unless a false positive rate is given. The
+    index is kept in index_dir if given.
+    """
+    if fp_rate is None:
+        return SortedIndex(source, index_dir=index_dir)
+    return BloomFilter(source, fp_rate, index_dir=index_dir)
@@ -0,0 +1,74 @@
+# Framing used between the Fuzex server and its clients.
+#
+# A client sends requests as a 4 byte big endian length followed by a
+# JSON object:
+#   {"op": "generate", "cmd": "...", "start": 0, "stop": 100}
+#   {"op": "size", "cmd": "..."}
+# start and stop are optional and default to the whole expression.
+#
+# The server answers every request with a sequence of frames, each a
+# 1 byte type, a 4 byte big endian length and a payload:
+#   D   newline terminated lines, UTF-8 encoded
+#   S   size of the expression, as decimal ASCII
+#   E   error message, ends the response
+#   Z   end of the response, empty payload
+# A connection can carry any number of requests one after the other.
+
+import json
+import struct
+
+FRAME_DATA = b"D"
+FRAME_SIZE = b"S"
+FRAME_ERROR = b"E"
+FRAME_END = b"Z"
+
+_LENGTH = struct.Struct(">I")
+_HEADER = struct.Struct(">cI")
+
+
+class ProtocolException(Exception):
+    pass
+
+
+def _recv_exact(sock, n):
+    data = bytearray()
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            if data:
+                raise ProtocolException("Connection closed in the middle of a frame.")
+            return None
+        data += chunk
+    return bytes(data)
+
+
+def send_request(sock, request):
+    payload = json.dumps(request).encode()
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def recv_request(sock):
+    """Returns the next request on sock, or None once the peer is done."""
+    header = _recv_exact(sock, _LENGTH.size)
+    if header is None:
+        return None
+    (length,) = _LENGTH.unpack(header)
+    payload = _recv_exact(sock, length)
+    if payload is None:
+        raise ProtocolException("Connection closed in the middle of a frame.")
+    return json.loads(payload)
+
+
+def send_frame(sock, kind, payload=b""):
+    sock.sendall(_HEADER.pack(kind, len(payload)) + payload)
+
+
+def recv_frame(sock):
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        raise ProtocolException("Connection closed by the server.")
+    kind, length = _HEADER.unpack(header)
+    payload = _recv_exact(sock, length) if length else b""
+    if payload is None:
+        raise ProtocolException("Connection closed in the middle of a frame.")
+    return kind, payload
@@ -0,0 +1,99 @@
+import os
+import socketserver
+import stat
+from functools import lru_cache
+
+from .helpers import err_print
+from .protocol import (
+    FRAME_DATA,
+    FRAME_END,
+    FRAME_ERROR,
+    FRAME_SIZE,
+    recv_request,
+    send_frame,
+)
+
+# Number of compiled expressions kept by the server.
+COMPILE_CACHE_SIZE = 128
+
+# Number of lines sent in a single data frame.
+FRAME_LINES = 1 << 12
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def compile_expression(cmd):
+    """Parses cmd once, returning the expression and its size."""
+    from .core.parse import Parser
+
+    expression = Parser(cmd).parse()
+    return expression, expression.size()
+
+
+class FuzexRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            while True:
+                request = recv_request(self.request)
+                if request is None:
+                    return
+                self.respond(request)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def respond(self, request):
+        try:
+            op = request.get("op", "generate")
+            expression, size = compile_expression(request["cmd"])
+            if op == "size":
+                send_frame(self.request, FRAME_SIZE, str(size).encode())
+            elif op == "generate":
+                start = request.get("start") or 0
+                stop = request.get("stop")
+                self.stream(expression, start, size if stop is None else stop)
+            else:
+                raise ValueError(f"Unknown operation {op}.")
+        except (BrokenPipeError, ConnectionResetError):
+            raise
+        except Exception as e:
+            send_frame(self.request, FRAME_ERROR, str(e).encode())
+            return
+
+        send_frame(self.request, FRAME_END)
+
+    def stream(self, expression, start, stop):
+        batch = []
+        for line in expression.generate_range(start, stop):
+            batch.append(line)
+            if len(batch) == FRAME_LINES:
+                batch.append("")
+                send_frame(self.request, FRAME_DATA, "\n".join(batch).encode())
+                batch = []
+        if batch:
+            batch.append("")
+            send_frame(self.request, FRAME_DATA, "\n".join(batch).encode())
+
+
+class FuzexServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Long lived server that keeps compiled expressions in memory and
+    streams their output to any number of local clients over a Unix
+    domain socket. See lib/protocol.py for the wire format.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path) -> None:
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+        super().__init__(path, FuzexRequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def serve(path):
+    with FuzexServer(path) as server:
+        err_print(f"Serving on {path}")
+        server.serve_forever()
@@ -0,0 +1,133 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+import random
+import tempfile
+import unittest
+from unittest import TestCase
+
+import lib.exclude as exclude
+from lib.exclude import *
+
+
+class TestExclude(TestCase):
+    alphabet = "ab\x01\té"
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.run_bytes = exclude.RUN_BYTES
+        self.offset_batch = exclude.OFFSET_BATCH
+        exclude.RUN_BYTES = 512
+        exclude.OFFSET_BATCH = 16
+
+        rng = random.Random(7)
+        self.words = [
+            "".join(rng.choice(self.alphabet) for _ in range(rng.randint(0, 6)))
+            for _ in range(600)
+        ]
+        self.source = self._write("words.txt", "".join(w + "\n" for w in self.words))
+
+    def tearDown(self):
+        exclude.RUN_BYTES = self.run_bytes
+        exclude.OFFSET_BATCH = self.offset_batch
+        self.directory.cleanup()
+
+    def _write(self, name, text, newline="\n"):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8", newline=newline) as f:
+            f.write(text)
+        return path
+
+    def _candidates(self):
+        rng = random.Random(11)
+        return set(self.words) | {
+            "".join(rng.choice(self.alphabet) for _ in range(rng.randint(0, 7)))
+            for _ in range(2000)
+        }
+
+    def test_several_runs(self):
+        runs = exclude._sorted_runs(self.source, self.directory.name)
+        self.assertGreater(len(runs), 1)
+        for run in runs:
+            run.close()
+
+    def test_sorted_index(self):
+        expected = set(self.words)
+        index = SortedIndex(self.source)
+        self.assertEqual(len(index), len(expected))
+        self.assertGreater(len(index), exclude.OFFSET_BATCH * 2)
+        for word in self._candidates():
+            self.assertEqual(word in index, word in expected, repr(word))
+        index.close()
+
+    def test_reuse(self):
+        SortedIndex(self.source).close()
+        path = self.source + INDEX_SUFFIX
+        built = os.stat(path).st_mtime_ns
+        index = SortedIndex(self.source)
+        self.assertEqual(index.path, path)
+        self.assertEqual(os.stat(path).st_mtime_ns, built)
+        index.close()
+
+    def test_rebuild(self):
+        SortedIndex(self.source).close()
+        with open(self.source, "a", encoding="utf-8") as f:
+            f.write("zzz\n")
+        st = os.stat(self.source)
+        os.utime(self.source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        index = SortedIndex(self.source)
+        self.assertIn("zzz", index)
+        self.assertEqual(len(index), len(set(self.words) | {"zzz"}))
+        index.close()
+
+    def test_crlf(self):
+        source = self._write("crlf.txt", "abc\ndef\n\nghi", newline="\r\n")
+        for exclusion in (SortedIndex(source), BloomFilter(source, 0.01)):
+            for word in ["abc", "def", "", "ghi"]:
+                self.assertIn(word, exclusion)
+            self.assertNotIn("abc\r", exclusion)
+            exclusion.close()
+
+    def test_index_dir(self):
+        index_dir = os.path.join(self.directory.name, "cache")
+        index = open_exclusion(self.source, index_dir=index_dir)
+        self.assertEqual(os.path.dirname(index.path), index_dir)
+        self.assertFalse(os.path.exists(self.source + INDEX_SUFFIX))
+        self.assertIn(self.words[0], index)
+        index.close()
+        self.assertEqual(
+            [n for n in os.listdir(index_dir) if n.endswith(".tmp")], []
+        )
+
+    def test_fallback(self):
+        blocked = self._write("blocked", "")
+        paths = [os.path.join(blocked, "words.fzxidx")] + exclude._index_paths(
+            self.source, INDEX_SUFFIX, os.path.join(self.directory.name, "cache")
+        )
+        path, mm, fields = exclude._load_index(
+            self.source,
+            paths,
+            exclude._INDEX_HEADER,
+            exclude._INDEX_MAGIC,
+            lambda path: SortedIndex.build(self.source, path),
+        )
+        self.assertEqual(path, paths[1])
+        mm.close()
+
+        with self.assertRaises(ExcludeException):
+            SortedIndex(self.source, path=paths[0])
+
+    def test_bloom_filter(self):
+        expected = set(self.words)
+        bloom = open_exclusion(self.source, 0.01)
+        for word in expected:
+            self.assertIn(word, bloom)
+        false_positives = sum(w in bloom for w in self._candidates() - expected)
+        self.assertLess(false_positives, 0.05 * len(self._candidates() - expected))
+        bloom.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import TestCase
+
+from lib.client import *
+from lib.core.parse import Parser
+from lib.protocol import *
+from lib.server import *
+
+
+class TestServer(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "fuzex.sock")
+        self.server = FuzexServer(self.path)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def test_size(self):
+        with FuzexClient(self.path) as client:
+            self.assertEqual(client.size(r"[a-z]{2}"), 26 * 26)
+
+    def test_generate_range(self):
+        expected = list(Parser(r"([a-c]\d){2}").parse().generate())
+        with FuzexClient(self.path) as client:
+            self.assertEqual(list(client.generate(r"([a-c]\d){2}")), expected)
+            self.assertEqual(
+                list(client.generate(r"([a-c]\d){2}", 17, 412)), expected[17:412]
+            )
+
+    def test_error(self):
+        with FuzexClient(self.path) as client:
+            with self.assertRaises(ClientException):
+                client.size(r"a{3,")
+            with self.assertRaises(ClientException):
+                list(client.generate(r"[z-a]"))
+
+            # The connection is still usable after an error.
+            self.assertEqual(client.size(r"ab?"), 2)
+
+    def test_requests_on_one_connection(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        try:
+            send_request(sock, {"op": "size", "cmd": r"\d"})
+            send_request(sock, {"op": "generate", "cmd": r"\d", "start": 8})
+
+            self.assertEqual(recv_frame(sock), (FRAME_SIZE, b"10"))
+            self.assertEqual(recv_frame(sock), (FRAME_END, b""))
+            self.assertEqual(recv_frame(sock), (FRAME_DATA, b"8\n9\n"))
+            self.assertEqual(recv_frame(sock), (FRAME_END, b""))
+        finally:
+            sock.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
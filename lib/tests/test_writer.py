@@ -0,0 +1,47 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+import tempfile
+import unittest
+from unittest import TestCase
+
+from lib.core.parse import Parser
+from lib.writer import *
+
+
+class TestWriter(TestCase):
+    write_ex = [r"ab{,2}c{3,4}", r"([a-c]\d){2}é?", r"x(ab?[cd]){0,3}y", r"[]", r"a{0}", r""]
+
+    def test_split_ranges(self):
+        for size, count in [(10, 3), (2, 5), (0, 4), (7, 1)]:
+            ranges = list(split_ranges(size, count))
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], size)
+            self.assertLessEqual(len(ranges), max(count, 1))
+            for (_, stop), (start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(stop, start)
+
+    def test_line_offset(self):
+        exp = Parser(r"é[ab]{1,2}").parse()
+        lines = list(exp.generate())
+        for i in range(len(lines) + 1):
+            expected = len("".join(line + "\n" for line in lines[:i]).encode())
+            self.assertEqual(line_offset(exp, i), expected)
+
+    def test_write_parallel(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "out.txt")
+            for e in self.write_ex:
+                with open(path, "w"):
+                    pass
+                write_parallel(e, path, 2)
+
+                expected = "".join(l + "\n" for l in Parser(e).parse().generate())
+                with open(path, "rb") as f:
+                    self.assertEqual(f.read(), expected.encode(), f"On input {e}.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Number of lines joined and written with a single pwrite.
+WRITE_BATCH = 1 << 14
+
+# Number of index ranges handed out per worker, so that workers which
+# finish early can pick up more of the remaining work.
+RANGES_PER_JOB = 4
+
+_expression = None
+
+
+class WriterException(Exception):
+    pass
+
+
+def _parse(cmd):
+    from .core.parse import Parser
+
+    return Parser(cmd).parse()
+
+
+def line_offset(expression, index):
+    """Byte offset at which line `index` starts in the generated output."""
+    return expression.prefix_bytes(index) + index
+
+
+def split_ranges(size, count):
+    """Splits [0, size) into at most count contiguous index ranges."""
+    count = max(1, min(count, size))
+    step, extra = divmod(size, count)
+    start = 0
+    for i in range(count):
+        stop = start + step + (1 if i < extra else 0)
+        yield start, stop
+        start = stop
+
+
+def _init_worker(cmd):
+    global _expression
+    _expression = _parse(cmd)
+
+
+def _pwrite_all(fd, data, offset):
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+    return offset
+
+
+def _write_range(path, start, stop, offset):
+    """Generates lines start to stop and writes them at offset in path."""
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        batch = []
+        for line in _expression.generate_range(start, stop):
+            batch.append(line)
+            if len(batch) == WRITE_BATCH:
+                batch.append("")
+                offset = _pwrite_all(fd, "\n".join(batch).encode(), offset)
+                batch = []
+        if batch:
+            batch.append("")
+            offset = _pwrite_all(fd, "\n".join(batch).encode(), offset)
+    finally:
+        os.close(fd)
+    return offset
+
+
+def write_parallel(cmd, path, jobs):
+    """
+    Writes the output of the expression `cmd` to path using a pool of
+    jobs processes. The output is split into index ranges, the byte
+    offset of each range is computed from the expression without
+    generating it, and every worker writes its range in place into the
+    preallocated file. The result is identical to writing the lines of
+    Expression.generate() in order.
+    """
+    if not hasattr(os, "pwrite"):
+        raise WriterException("Parallel output requires os.pwrite.")
+
+    expression = _parse(cmd)
+    size = expression.size()
+    os.truncate(path, line_offset(expression, size))
+    if size == 0:
+        return
+
+    ranges = [
+        (start, stop, line_offset(expression, start), line_offset(expression, stop))
+        for start, stop in split_ranges(size, jobs * RANGES_PER_JOB)
+    ]
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(cmd,)
+    ) as pool:
+        futures = [
+            (pool.submit(_write_range, path, start, stop, offset), end)
+            for start, stop, offset, end in ranges
+        ]
+        for future, end in futures:
+            written = future.result()
+            if written != end:
+                raise WriterException(
+                    f"Range ending at byte {end} was written up to byte {written}."
+                )